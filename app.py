@@ -1,13 +1,139 @@
 from flask import Flask, jsonify, request
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
+import orjson
+import asyncio
+import heapq
+import aiohttp
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+import lxml.html
 import re
-from urllib.parse import urljoin, quote
+import threading
+from cachetools import TTLCache
+from urllib.parse import urljoin, urlsplit, quote
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 import json
 
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # без selectolax документы разбираются через lxml
+    LexborHTMLParser = None
+
+_LXML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+class OrjsonProvider(JSONProvider):
+    """JSON-провайдер Flask на базе orjson (используется в jsonify)"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+app.config['COMPRESS_MIN_SIZE'] = 1024
+Compress(app)
+
+# Признаки ссылок на документы в списках
+_HREF_RE = re.compile(r'/mega_doc/|gost|federalnyj-zakon|prikaz|postanovlenie')
+_DOC_LINK_CLASSES = frozenset(('doc-link', 'document-link'))
+
+def _search_by_priority(branches, *texts):
+    """Значение группы первого по приоритету шаблона, найденного в текстах.
+    
+    Шаблоны (литерал, выражение) проверяются по порядку, для каждого шаблона
+    тексты также проверяются по порядку. Шаблон не запускается на тексте,
+    в котором нет его обязательного литерала (None — литерала нет).
+    """
+    for literal, regex in branches:
+        for text in texts:
+            if literal is not None and literal not in text:
+                continue
+            match = regex.search(text)
+            if match:
+                return match.group(1)
+    return None
+
+# Тип документа по фрагменту URL (проверяются по порядку)
+_TYPE_MAP = (
+    ('/gost', "ГОСТ"),
+    ('/standart', "ГОСТ"),
+    ('/federalnyj-zakon', "Федеральный закон"),
+    ('/prikaz', "Приказ"),
+    ('/postanovlenie', "Постановление"),
+    ('/snip', "СНиП"),
+    ('/sp', "СП")
+)
+
+# Номер документа в названии или URL ссылки: шаблоны проверяются по
+# приоритету, литерал позволяет не запускать шаблон на тексте без него
+_NUM_BRANCHES = (
+    ('№', re.compile(r'№\s*(\d+[-/]\d+)')),
+    (None, re.compile(r'(\d{4,5}[-/]\d{4})')),
+    ('ГОСТ', re.compile(r'ГОСТ\s+Р?\s*(\d+(?:\.\d+)*[-/]\d+)')),
+    ('СП', re.compile(r'СП\s+(\d+(?:\.\d+)*)')),
+    ('СНиП', re.compile(r'СНиП\s+(\d+(?:\.\d+)*[-/]\d+)')),
+    (None, re.compile(r'(\d+\.\d+\.\d+)')),
+    (None, re.compile(r'(\d+-\d+)'))
+)
+
+# Дата принятия и номер в тексте документа. Шаблоны даты проверяются по
+# приоритету: дата вида «от ДД.ММ.ГГГГ» важнее любой другой даты на странице
+_DATE_PATTERNS = [re.compile(p) for p in (
+    r'от\s+(\d{1,2}\.\d{1,2}\.\d{4})',
+    r'(\d{1,2}\.\d{1,2}\.\d{4})',
+    r'(\d{4}-\d{2}-\d{2})'
+)]
+_META_NUM_BRANCHES = (
+    ('№', re.compile(r'№\s*([№\d\-/]+)')),
+    ('ГОСТ', re.compile(r'ГОСТ\s+Р?\s*(\d+(?:\.\d+)*[-/]\d+)')),
+    (None, re.compile(r'(\d{4,5}[-/]\d{4})'))
+)
+
+# Статус документа указывается в начале его основного содержимого
+_STATUS_WINDOW = 4096
+
+# Очистка HTML основного содержимого
+_FONT_TAG_RE = re.compile(r'<(/?)font[^>]*>')
+# Пробельные последовательности, отличные от одного обычного пробела:
+# одиночные пробелы между словами не заменяются и не копируются по частям
+_WS_RE = re.compile(r'[^\S ]\s*| \s+')
+
+# Повторные попытки загрузки страниц (общие для requests и aiohttp)
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.3
+RETRY_STATUSES = (502, 503, 504)
+
+# Кэш разобранных списков документов: URL страницы -> список ссылок
+LIST_CACHE_TTL = 600
+_LIST_CACHE = TTLCache(maxsize=16, ttl=LIST_CACHE_TTL)
+_LIST_CACHE_LOCK = threading.Lock()
+
+# Последняя отформатированная метка времени: (секунда, строка)
+_now_iso_cache = (0, '')
+
+def now_iso():
+    """Текущее время UTC в ISO 8601 с точностью до секунды.
+    
+    Строка форматируется не чаще раза в секунду.
+    """
+    global _now_iso_cache
+    now = int(time.time())
+    cached_at, cached = _now_iso_cache
+    if cached_at == now:
+        return cached
+    formatted = datetime.fromtimestamp(now, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    _now_iso_cache = (now, formatted)
+    return formatted
 
 class MegaNormAPI:
     def __init__(self):
@@ -16,19 +142,26 @@ class MegaNormAPI:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        
+        # Пул соединений и повторные попытки на уровне urllib3
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=50,
+            max_retries=Retry(total=RETRY_TOTAL, backoff_factor=RETRY_BACKOFF_FACTOR,
+                              status_forcelist=RETRY_STATUSES)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
-    def get_page(self, url, retries=3):
-        """Получение страницы с повторными попытками"""
-        for attempt in range(retries):
-            try:
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
-                response.encoding = 'utf-8'
-                return response
-            except requests.RequestException as e:
-                if attempt == retries - 1:
-                    raise e
-                time.sleep(2)
+    def get_page(self, url):
+        """Получение содержимого страницы в байтах.
+        
+        Ответ закрывается сразу после чтения тела, чтобы соединение вернулось
+        в пул. Повторные попытки выполняет адаптер сессии.
+        """
+        with self.session.get(url, timeout=30) as response:
+            response.raise_for_status()
+            return response.content
     
     def clean_text(self, text):
         """Очистка текста от лишних символов и форматирование"""
@@ -47,138 +180,203 @@ class MegaNormAPI:
         
         return text
     
+    def _cached_list(self, url):
+        """Список документов из кэша или None"""
+        with _LIST_CACHE_LOCK:
+            return _LIST_CACHE.get(url)
+    
+    def _store_list(self, url, documents):
+        """Сохранение списка документов в кэш"""
+        with _LIST_CACHE_LOCK:
+            _LIST_CACHE[url] = documents
+    
     def parse_document_list(self, url):
-        """Парсинг списка документов"""
-        try:
-            response = self.get_page(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            documents = []
-            
-            # Улучшенный поиск ссылок на документы
-            doc_selectors = [
-                'a[href*="/mega_doc/"]',
-                '.doc-link',
-                '.document-link',
-                'a[href*="gost"]',
-                'a[href*="federalnyj-zakon"]',
-                'a[href*="prikaz"]',
-                'a[href*="postanovlenie"]'
-            ]
-            
-            doc_links = []
-            for selector in doc_selectors:
-                found_links = soup.select(selector)
-                doc_links.extend(found_links)
-            
-            # Удаление дубликатов
-            seen_urls = set()
-            unique_links = []
-            for link in doc_links:
-                href = link.get('href')
-                if href and href not in seen_urls and not href.endswith('_0.html'):
-                    seen_urls.add(href)
-                    unique_links.append(link)
-            
-            for link in unique_links[:100]:  # Ограничиваем количество для производительности
-                doc_info = self.extract_document_info_from_link(link)
-                if doc_info:
-                    documents.append(doc_info)
-            
+        """Парсинг списка документов.
+        
+        Возвращает ссылки на документы (см. extract_document_info_from_link);
+        полные описания строит hydrate_document только для нужных ссылок.
+        """
+        documents = self._cached_list(url)
+        if documents is not None:
             return documents
+        
+        try:
+            content = self.get_page(url)
+            documents = self.parse_document_list_html(content)
             
         except Exception as e:
             raise Exception(f"Ошибка при парсинге списка документов: {str(e)}")
+        
+        self._store_list(url, documents)
+        return documents
+    
+    def parse_document_lists(self, urls):
+        """Парсинг нескольких списков документов.
+        
+        Страницы, которых нет в кэше, загружаются параллельно. Возвращает
+        пары (url, список ссылок на документы или исключение) в порядке urls.
+        """
+        results = {url: self._cached_list(url) for url in urls}
+        missing = [url for url, documents in results.items() if documents is None]
+        
+        if missing:
+            for url, content in zip(missing, self.fetch_pages(missing)):
+                if isinstance(content, Exception):
+                    results[url] = content
+                    continue
+                try:
+                    documents = self.parse_document_list_html(content)
+                except Exception as e:
+                    results[url] = e
+                    continue
+                self._store_list(url, documents)
+                results[url] = documents
+        
+        return [(url, results[url]) for url in urls]
+    
+    def parse_document_list_html(self, content):
+        """Парсинг HTML страницы со списком документов в список ссылок"""
+        # Разбираем только теги <a> с атрибутом href
+        soup = BeautifulSoup(content, 'lxml',
+                             parse_only=SoupStrainer('a', href=True))
+        
+        document_links = []
+        
+        # Поиск ссылок на документы с удалением дубликатов за один проход
+        seen_urls = set()
+        unique_links = []
+        for link in soup.find_all('a'):
+            href = link['href']
+            if not href or href in seen_urls or href.endswith('_0.html'):
+                continue
+            if not (_HREF_RE.search(href)
+                    or _DOC_LINK_CLASSES.intersection(link.get('class', ()))):
+                continue
+            seen_urls.add(href)
+            unique_links.append(link)
+            if len(unique_links) == 100:  # Ограничиваем количество для производительности
+                break
+        
+        for link in unique_links:
+            doc_info = self.extract_document_info_from_link(link)
+            if doc_info:
+                document_links.append(doc_info)
+        
+        return document_links
+    
+    async def _fetch(self, session, url):
+        """Асинхронная загрузка страницы.
+        
+        Повторяет запрос при ошибках соединения и статусах RETRY_STATUSES,
+        как адаптер синхронной сессии.
+        """
+        for attempt in range(RETRY_TOTAL + 1):
+            if attempt:
+                await asyncio.sleep(RETRY_BACKOFF_FACTOR * 2 ** (attempt - 1))
+            try:
+                async with session.get(url) as response:
+                    if response.status in RETRY_STATUSES and attempt < RETRY_TOTAL:
+                        continue
+                    response.raise_for_status()
+                    return await response.read()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == RETRY_TOTAL:
+                    raise
+    
+    async def _fetch_all(self, urls):
+        """Одновременная загрузка страниц через общую сессию"""
+        connector = aiohttp.TCPConnector(limit=10)
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers=dict(self.session.headers)) as session:
+            return await asyncio.gather(*(self._fetch(session, url) for url in urls),
+                                        return_exceptions=True)
+    
+    def fetch_pages(self, urls):
+        """Параллельная загрузка нескольких страниц.
+        
+        Возвращает список содержимого страниц (bytes) или исключений
+        в порядке переданных URL.
+        """
+        return asyncio.run(self._fetch_all(urls))
     
     def extract_document_info_from_link(self, link):
-        """Извлечение информации о документе из ссылки"""
+        """Извлечение названия и адреса документа из ссылки"""
         try:
             href = link.get('href')
             if not href:
                 return None
-                
-            full_url = urljoin(self.base_url, href)
             
             # Извлечение названия из текста ссылки
             title = self.clean_text(link.get_text(strip=True))
             if not title or len(title) < 3:
                 return None
             
-            # Определение типа документа по URL
-            doc_type = self.determine_document_type(href)
-            
-            # Извлечение номера документа из URL или названия
-            doc_number = self.extract_document_number(href, title)
-            
             return {
                 "title": title,
-                "url": full_url,
-                "type": doc_type,
-                "number": doc_number,
-                "relative_url": href
+                "relative_url": href,
+                "title_lower": title.lower()  # для поиска по спискам из кэша
             }
             
         except Exception as e:
             print(f"Ошибка извлечения информации о документе: {str(e)}")
             return None
     
+    def absolute_url(self, href):
+        """Абсолютный URL для ссылки со страницы сайта"""
+        # Ссылки от корня сайта и абсолютные ссылки не требуют разбора urljoin
+        if href.startswith('/') and not href.startswith('//'):
+            return self.base_url + href
+        if href.startswith(('https://', 'http://')):
+            return href
+        return urljoin(self.base_url, href)
+    
+    def hydrate_document(self, link_info, **extra):
+        """Полное описание документа по ссылке из списка"""
+        href = link_info["relative_url"]
+        title = link_info["title"]
+        
+        document = {
+            "title": title,
+            "url": self.absolute_url(href),
+            # Определение типа документа по URL
+            "type": self.determine_document_type(href),
+            # Извлечение номера документа из URL или названия
+            "number": self.extract_document_number(href, title),
+            "relative_url": href
+        }
+        document.update(extra)
+        return document
+    
     def determine_document_type(self, url):
         """Определение типа документа по URL"""
         url_lower = url.lower()
-        if '/gost' in url_lower or '/standart' in url_lower:
-            return "ГОСТ"
-        elif '/federalnyj-zakon' in url_lower:
-            return "Федеральный закон"
-        elif '/prikaz' in url_lower:
-            return "Приказ"
-        elif '/postanovlenie' in url_lower:
-            return "Постановление"
-        elif '/snip' in url_lower:
-            return "СНиП"
-        elif '/sp' in url_lower:
-            return "СП"
-        else:
-            return "Документ"
+        return next((doc_type for key, doc_type in _TYPE_MAP if key in url_lower), "Документ")
     
     def extract_document_number(self, url, title):
         """Извлечение номера документа"""
-        # Попытка извлечь номер из названия
-        number_patterns = [
-            r'№\s*(\d+[-/]\d+)',
-            r'(\d{4,5}[-/]\d{4})',
-            r'ГОСТ\s+Р?\s*(\d+(?:\.\d+)*[-/]\d+)',
-            r'СП\s+(\d+(?:\.\d+)*)',
-            r'СНиП\s+(\d+(?:\.\d+)*[-/]\d+)',
-            r'(\d+\.\d+\.\d+)',
-            r'(\d+-\d+)'
-        ]
-        
         combined_text = f"{title} {url}"
         
-        for pattern in number_patterns:
-            match = re.search(pattern, combined_text)
-            if match:
-                return match.group(1)
-        
-        return None
+        return _search_by_priority(_NUM_BRANCHES, combined_text)
     
     def get_document_details(self, doc_url):
         """Получение детальной информации о документе"""
         try:
-            response = self.get_page(doc_url)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            content = self.get_page(doc_url)
+            tree = self.parse_document_html(content)
             
             # Извлечение основной информации
-            title = self.extract_title(soup)
-            content_sections = self.extract_content_sections(soup)
-            metadata = self.extract_metadata(soup, title)
+            title = self.extract_title(tree)
+            main_content = self.find_main_content(tree)
+            content_sections = self.extract_content_sections(main_content)
+            metadata = self.extract_metadata(tree, title, main_content)
             
             return {
                 "title": title,
                 "sections": content_sections,
                 "metadata": metadata,
                 "url": doc_url,
-                "parsed_at": datetime.now().isoformat(),
+                "parsed_at": now_iso(),
                 "status": "success"
             }
             
@@ -187,10 +385,57 @@ class MegaNormAPI:
                 "error": f"Ошибка при получении деталей документа: {str(e)}",
                 "url": doc_url,
                 "status": "error",
-                "parsed_at": datetime.now().isoformat()
+                "parsed_at": now_iso()
             }
     
-    def extract_title(self, soup):
+    def parse_document_html(self, content):
+        """Построение дерева документа (selectolax, если доступен).
+        
+        Скрипты и стили удаляются из всего дерева, чтобы их код не попадал
+        в текст, по которому ищутся метаданные.
+        """
+        if LexborHTMLParser is not None:
+            tree = LexborHTMLParser(content)
+            for element in tree.css('script, style'):
+                element.decompose()
+            return tree
+        tree = lxml.html.document_fromstring(content, parser=_LXML_PARSER)
+        for element in list(tree.iter('script', 'style')):
+            element.drop_tree()
+        return tree
+    
+    def _first_matches(self, tree, selectors):
+        """Первые элементы для простых селекторов (тег или .класс) за один проход.
+        
+        Возвращает по одному элементу на каждый найденный селектор в порядке
+        приоритета селекторов, как при последовательных вызовах select_one.
+        """
+        combined = ', '.join(selectors)
+        if LexborHTMLParser is not None:
+            nodes = tree.css(combined)
+        else:
+            nodes = tree.cssselect(combined)
+        
+        priority = {selector: index for index, selector in enumerate(selectors)}
+        first = {}
+        for node in nodes:
+            if LexborHTMLParser is not None:
+                classes = node.attributes.get('class') or ''
+            else:
+                classes = node.get('class') or ''
+            for key in [node.tag] + ['.' + cls for cls in classes.split()]:
+                rank = priority.get(key)
+                if rank is not None and rank not in first:
+                    first[rank] = node
+        return [first[rank] for rank in sorted(first)]
+    
+    def _node_text(self, node):
+        """Текст элемента или всего дерева"""
+        if LexborHTMLParser is not None:
+            return node.text()
+        return node.text_content()
+    
+    def extract_title(self, tree):
         """Извлечение заголовка документа"""
         title_selectors = [
             'h1',
@@ -200,20 +445,15 @@ class MegaNormAPI:
             'title'
         ]
         
-        for selector in title_selectors:
-            element = soup.select_one(selector)
-            if element:
-                title = self.clean_text(element.get_text())
-                if title and len(title) > 5:
-                    return title
+        for element in self._first_matches(tree, title_selectors):
+            title = self.clean_text(self._node_text(element))
+            if title and len(title) > 5:
+                return title
         
         return "Документ без названия"
     
-    def extract_content_sections(self, soup):
-        """Извлечение содержимого документа с сохранением HTML-структуры"""
-        sections = []
-    
-        # Поиск основного содержимого
+    def find_main_content(self, tree):
+        """Поиск основного содержимого и удаление из него ненужных элементов"""
         content_selectors = [
             '.document-content',
             '.doc-content',
@@ -223,30 +463,35 @@ class MegaNormAPI:
             'article'
         ]
     
-        main_content = None
-        for selector in content_selectors:
-            element = soup.select_one(selector)
-            if element:
-                main_content = element
-                break
-    
-        if not main_content:
-            main_content = soup.find('body')
-    
-        if main_content:
-            # Удаление ненужных элементов
-            for element in main_content(['script', 'style', 'nav', 'header', 'footer', 'aside']):
+        candidates = self._first_matches(tree, content_selectors)
+        main_content = candidates[0] if candidates else tree.body
+        if main_content is None:
+            return None
+        
+        # Удаление ненужных элементов с сохранением HTML-структуры
+        if LexborHTMLParser is not None:
+            for element in main_content.css('script, style, nav, header, footer, aside'):
                 element.decompose()
+        else:
+            for element in list(main_content.iter('script', 'style', 'nav', 'header', 'footer', 'aside')):
+                element.drop_tree()
+        return main_content
     
-            # Сохраняем HTML-структуру
-            html_content = str(main_content)
+    def extract_content_sections(self, main_content):
+        """Извлечение содержимого документа с сохранением HTML-структуры"""
+        sections = []
+    
+        if main_content is not None:
+            if LexborHTMLParser is not None:
+                html_content = main_content.html
+            else:
+                html_content = lxml.html.tostring(main_content, encoding='unicode', with_tail=False)
             
             # Очистка и форматирование HTML
-            html_content = re.sub(r'<(/?)font[^>]*>', r'<\1span>', html_content)  # Замена устаревших тегов
-            html_content = html_content.replace('\n', ' ').replace('\r', '')
-            html_content = re.sub(r'\s+', ' ', html_content)
-            html_content = re.sub(r'(<[^>]+>)\s+', r'\1', html_content)
-            html_content = re.sub(r'\s+(<[^>]+>)', r'\1', html_content)
+            html_content = _FONT_TAG_RE.sub(r'<\1span>', html_content)  # Замена устаревших тегов
+            html_content = _WS_RE.sub(' ', html_content)
+            # После схлопывания пробелы у тегов одиночные, регулярные выражения не нужны
+            html_content = html_content.replace('> ', '>').replace(' <', '<')
     
             # Добавляем базовые стили для сохранения форматирования
             html_content = f'''
@@ -268,40 +513,31 @@ class MegaNormAPI:
     
         return sections
     
-    def extract_metadata(self, soup, title):
-        """Извлечение метаданных документа"""
+    def extract_metadata(self, tree, title, main_content=None):
+        """Извлечение метаданных документа.
+        
+        Дата, номер и статус ищутся в тексте основного содержимого (без меню
+        и служебных блоков сайта); если оно не найдено — в тексте страницы.
+        """
         metadata = {}
         
-        text = soup.get_text()
+        source = main_content if main_content is not None else tree
+        text = self._node_text(source)
         
         # Поиск даты принятия
-        date_patterns = [
-            r'от\s+(\d{1,2}\.\d{1,2}\.\d{4})',
-            r'(\d{1,2}\.\d{1,2}\.\d{4})',
-            r'(\d{4}-\d{2}-\d{2})'
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, text)
+        for pattern in _DATE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 metadata['date'] = match.group(1)
                 break
         
-        # Поиск номера документа
-        number_patterns = [
-            r'№\s*([№\d\-/]+)',
-            r'ГОСТ\s+Р?\s*(\d+(?:\.\d+)*[-/]\d+)',
-            r'(\d{4,5}[-/]\d{4})'
-        ]
-        
-        for pattern in number_patterns:
-            match = re.search(pattern, f"{title} {text}")
-            if match:
-                metadata['number'] = match.group(1)
-                break
+        # Поиск номера документа в заголовке и тексте (без склейки строк)
+        number = _search_by_priority(_META_NUM_BRANCHES, title, text)
+        if number:
+            metadata['number'] = number
         
-        # Поиск статуса
-        text_lower = text.lower()
+        # Поиск статуса в начале текста
+        text_lower = text[:_STATUS_WINDOW].lower()
         if 'действует' in text_lower:
             metadata['status'] = 'Действует'
         elif 'отменен' in text_lower or 'утратил силу' in text_lower:
@@ -331,7 +567,7 @@ def get_documents_by_type(doc_type):
                 'available_types': list(type_urls.keys())
             }), 400
         
-        documents = api.parse_document_list(type_urls[doc_type])
+        links = api.parse_document_list(type_urls[doc_type])
         
         # Пагинация
         page = max(1, int(request.args.get('page', 1)))
@@ -340,14 +576,17 @@ def get_documents_by_type(doc_type):
         start = (page - 1) * per_page
         end = start + per_page
         
-        return jsonify({
-            'documents': documents[start:end],
-            'total': len(documents),
+        # Полные описания строятся только для ссылок текущей страницы
+        response = jsonify({
+            'documents': [api.hydrate_document(link) for link in links[start:end]],
+            'total': len(links),
             'page': page,
             'per_page': per_page,
-            'pages': (len(documents) + per_page - 1) // per_page,
+            'pages': (len(links) + per_page - 1) // per_page,
             'status': 'success'
         })
+        response.cache_control.max_age = LIST_CACHE_TTL
+        return response
         
     except Exception as e:
         return jsonify({
@@ -366,13 +605,21 @@ def get_document_details():
                 'status': 'error'
             }), 400
         
-        # Проверка, что URL относится к MegaNorm
-        if not doc_url.startswith('https://meganorm.ru'):
+        # Проверка, что URL относится к MegaNorm (по схеме и хосту, а не по префиксу строки)
+        parts = urlsplit(doc_url)
+        try:
+            port = parts.port
+        except ValueError:  # некорректный порт
+            port = -1
+        if parts.scheme != 'https' or parts.hostname != 'meganorm.ru' or port not in (None, 443):
             return jsonify({
                 'error': 'URL должен принадлежать сайту meganorm.ru',
                 'status': 'error'
             }), 400
         
+        # Фрагмент не передается серверу
+        doc_url = parts._replace(fragment='').geturl()
+        
         document = api.get_document_details(doc_url)
         
         # Проверяем, не произошла ли ошибка при парсинге
@@ -427,39 +674,34 @@ def search_documents():
                 'status': 'error'
             }), 400
         
-        all_documents = []
-        for url in search_urls:
-            try:
-                documents = api.parse_document_list(url)
-                all_documents.extend(documents)
-            except Exception as e:
-                print(f"Ошибка при парсинге {url}: {str(e)}")
+        all_links = []
+        for url, links in api.parse_document_lists(search_urls):
+            if isinstance(links, Exception):
+                print(f"Ошибка при парсинге {url}: {str(links)}")
                 continue
+            all_links.extend(links)
         
         # Фильтрация по поисковому запросу
         query_lower = query.lower()
-        filtered_docs = []
-        
-        for doc in all_documents:
-            title_lower = doc['title'].lower()
-            if query_lower in title_lower:
-                # Добавляем релевантность
-                doc['relevance'] = title_lower.count(query_lower)
-                filtered_docs.append(doc)
-        
-        # Сортировка по релевантности
-        filtered_docs.sort(key=lambda x: x.get('relevance', 0), reverse=True)
+        matches = [
+            (link['title_lower'].count(query_lower), link)
+            for link in all_links
+            if query_lower in link['title_lower']
+        ]
         
-        # Ограничиваем результаты
-        max_results = min(100, len(filtered_docs))
+        # Лучшие результаты по релевантности
+        max_results = min(100, len(matches))
+        top_matches = heapq.nlargest(max_results, matches, key=lambda match: match[0])
         
-        return jsonify({
-            'documents': filtered_docs[:max_results],
+        response = jsonify({
+            'documents': [api.hydrate_document(link, relevance=relevance) for relevance, link in top_matches],
             'query': query,
-            'total': len(filtered_docs),
+            'total': len(matches),
             'showing': max_results,
             'status': 'success'
         })
+        response.cache_control.max_age = LIST_CACHE_TTL
+        return response
         
     except Exception as e:
         return jsonify({
@@ -485,7 +727,7 @@ def health_check():
     """Проверка работоспособности API"""
     return jsonify({
         'status': 'ok',
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': now_iso(),
         'service': 'MegaNorm API',
         'version': '1.1'
     })
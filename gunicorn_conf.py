@@ -0,0 +1,18 @@
+"""Конфигурация gunicorn для продакшн-запуска API.
+
+Запуск: gunicorn -c gunicorn_conf.py app:app
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Запросы в основном ждут ответа meganorm.ru, поэтому на процесс
+# приходится несколько потоков с общей сессией requests и кэшем списков
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+keepalive = 30
+# Загрузка страницы (до 30 секунд) с повторными попытками адаптера
+timeout = 120